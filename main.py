@@ -1,14 +1,24 @@
+import os
+
 from qiskit.converters import circuit_to_dag, dag_to_circuit
 from qiskit.quantum_info import Statevector
-from optimizations import HGateReduction, CxReduction, RzReduction
+from optimizations import HGateReduction, CxReduction, RzReduction, IdentityRzReduction
 
 import converters
 
+# Simulating the input and the optimized circuit is exponential in the number of qubits,
+# hence the equivalence check only runs if the VERIFY environment variable is set
+VERIFY = bool(os.environ.get("VERIFY"))
+# Drawing the circuits with matplotlib is far more expensive than the optimization itself,
+# hence the circuits are only drawn if the DRAW environment variable is set
+DRAW = bool(os.environ.get("DRAW"))
+
 # Convert the input to a quantum circuit
 parser = converters.Parser('./inputs/vbe_adder_3_before')
 netlist = parser.qc_to_netlist()
 input_qc = parser.netlist_to_qiskit_circuit(netlist)
-input_qc.draw(output='mpl', filename="./outputs/test_input")
+if DRAW:
+    input_qc.draw(output='mpl', filename="./outputs/test_input")
 dag = circuit_to_dag(input_qc)
 
 # Preserving the order of 'Light Optimization' as presented in the paper (without the 4th optimization procedure)
@@ -16,16 +26,27 @@ routine_dic = {1: "HGateReduction", 2: "RzReduction", 3: "CxReduction"}
 light_optimization = [1, 3, 2, 3, 1, 2, 3, 2]
 
 # Apply the optimization procedure
+# Every reduction removes gates whenever it changes the circuit, hence unchanged gate counts after a sweep
+# mean that a fixed point has been reached and a further sweep would not change anything
 for i in range(2):
+    counts = dag.count_ops()
     for routine in light_optimization:
         klass = globals()[routine_dic[routine]]
         reduction = klass(dag)
         dag = reduction.apply()
         reduction.report()
+    if dag.count_ops() == counts:
+        break
+
+# Remove the rotation gates which merged into the identity only after the whole optimization procedure
+reduction = IdentityRzReduction(dag)
+dag = reduction.apply()
+reduction.report()
 
 optimized_qc = dag_to_circuit(dag)
-assert Statevector.from_instruction(input_qc).equiv(Statevector.from_instruction(optimized_qc))
+if VERIFY:
+    assert Statevector.from_instruction(input_qc).equiv(Statevector.from_instruction(optimized_qc))
 
 # Draw the quantum circuit after optimization
-qc = dag_to_circuit(dag)
-qc.draw(output='mpl', filename="./outputs/test_optimized_input")
+if DRAW:
+    optimized_qc.draw(output='mpl', filename="./outputs/test_optimized_input")
@@ -1,7 +1,28 @@
+import math
+from collections import Counter, defaultdict
+
 import numpy as np
-from qiskit.circuit.library import HGate, RZGate
+from qiskit.circuit import ParameterExpression
+from qiskit.circuit.library import CXGate, HGate, RZGate
 from qiskit.dagcircuit import DAGCircuit, DAGNode
 
+_PI_2 = np.pi / 2
+_TWO_PI = 2 * np.pi
+
+# Integer tags of the gates the reductions dispatch on, see Reduction._cache_wires
+_OTHER, _H, _CX, _RZ, _S, _SDG = range(6)
+_TAGS = {"h": _H, "cx": _CX, "rz": _RZ, "s": _S, "sdg": _SDG}
+
+
+def _is_numeric(angle):
+    """
+    Returns whether the given angle can be cast to a float, i.e. whether it is not a parameter expression with
+    unbound parameters.
+
+    :param angle: The angle of a rotation gate
+    """
+    return not isinstance(angle, ParameterExpression) or not angle.parameters
+
 
 class Reduction:
     """
@@ -19,13 +40,17 @@ class Reduction:
         """
         self.dag = dag
         self.initial_counts = dag.count_ops()
+        # The number of removed gates per gate name, kept up to date by _remove and _replace
+        self.delta = Counter()
 
     def report(self):
         """
         Reports the gate count changes in the circuit (if there are any) after the reduction has been applied.
+        The gate counts after the reduction are derived from the tracked changes instead of recounting the DAG.
         """
 
-        optimized_counts = self.dag.count_ops()
+        optimized_counts = {gate: count - self.delta[gate] for gate, count in self.initial_counts.items()
+                            if count - self.delta[gate] > 0}
         for gate in self.initial_counts:
             if gate in optimized_counts:
                 if self.initial_counts[gate] > optimized_counts[gate]:
@@ -38,6 +63,95 @@ class Reduction:
     def apply(self):
         raise NotImplementedError("Implement the apply method")
 
+    def _cache_wires(self):
+        """
+        Materializes the operation nodes of every wire once, so that a pass can index into the cached lists
+        instead of walking the DAG again for every lookup. Must be called again after the DAG structure changed.
+
+        The wire index of a qubit is its position in the wire list of the DAG. Next to its nodes, every wire is
+        cached as parallel lists of plain integers (see _extract_soa), which the passes scan instead of the nodes,
+        and as a map from every node to its position on the wire.
+
+        All wires are filled by a single topological sweep (whose ordering runs inside retworkx), which visits the
+        nodes of every wire in wire order, instead of walking each wire edge by edge. The gate tag and the wire
+        indices of a node are computed once in this sweep, even if the node is attached to several wires.
+        """
+        self._wires = self.dag.wires
+        wire_index = self._wire_index = {wire: idx for idx, wire in enumerate(self._wires)}
+        self._wire_nodes = {wire: [] for wire in self._wires}
+        self._wire_soa = {wire: ([], [], []) for wire in self._wires}
+        self._wire_pos = {wire: {} for wire in self._wires}
+        for node in self.dag.topological_op_nodes():
+            qargs = node.qargs
+            tag = _TAGS.get(node.name, _OTHER)
+            control = wire_index[qargs[0]] if qargs else -1
+            target = wire_index[qargs[1]] if len(qargs) > 1 else -1
+            for wire in qargs + node.cargs:
+                wire_nodes = self._wire_nodes[wire]
+                tags, controls, targets = self._wire_soa[wire]
+                self._wire_pos[wire][node] = len(wire_nodes)
+                wire_nodes.append(node)
+                tags.append(tag)
+                controls.append(control)
+                targets.append(target)
+
+    def _refresh_wire(self, wire):
+        """
+        Materializes the operation nodes of the given wire again after the DAG structure changed on the wire.
+
+        :param wire: The wire to be materialized again
+        """
+        wire_nodes = self._wire_nodes[wire] = list(self.dag.nodes_on_wire(wire, True))
+        self._wire_soa[wire] = self._extract_soa(wire_nodes)
+        self._wire_pos[wire] = {node: i for i, node in enumerate(wire_nodes)}
+
+    def _extract_soa(self, wire_nodes: list):
+        """
+        Returns the given wire as three parallel lists of plain integers, so that the passes do not have to touch
+        the DAG nodes: the integer gate tags (so that the passes compare integers instead of gate names), the wire
+        indices of the first qubits (the controls of the CNOT Gates, -1 for classical instructions) and the wire
+        indices of the second qubits (the targets of the CNOT Gates, -1 for single qubit gates).
+
+        :param wire_nodes: The cached nodes of a wire
+        """
+        wire_index = self._wire_index
+        tags = [_TAGS.get(node.name, _OTHER) for node in wire_nodes]
+        controls = [wire_index[node.qargs[0]] if node.qargs else -1 for node in wire_nodes]
+        targets = [wire_index[node.qargs[1]] if len(node.qargs) > 1 else -1 for node in wire_nodes]
+        return tags, controls, targets
+
+    def _substitute(self, wire, index: int, op):
+        """
+        Replaces the operation of the single qubit node at the given index of the given wire inplace and keeps the
+        gate tag of the cached wire up to date.
+
+        :param wire: The wire the node is attached to
+        :param index: The index of the node on the wire
+        :param op: The new operation of the node
+        """
+        self._replace(self._wire_nodes[wire][index], op)
+        self._wire_soa[wire][0][index] = _TAGS.get(op.name, _OTHER)
+
+    def _replace(self, node: DAGNode, op):
+        """
+        Replaces the operation of the given node inplace and tracks the change of the gate counts.
+
+        :param node: The node to be substituted
+        :param op: The new operation of the node
+        """
+        self.delta[node.name] += 1
+        self.delta[op.name] -= 1
+        self.dag.substitute_node(node, op, inplace=True)
+
+    def _remove(self, node: DAGNode):
+        """
+        Removes the given node from the DAG and tracks the change of the gate counts.
+
+        :param node: The node to be removed
+        """
+        self.delta[node.name] += 1
+        self.dag.remove_op_node(node)
+
 
 class HGateReduction(Reduction):
     '''
@@ -46,6 +160,8 @@ class HGateReduction(Reduction):
 
     def __init__(self, dag: DAGCircuit):
         super().__init__(dag)
+        # The inverse of a phase gate only depends on its name and parameters, hence it is computed once per pass
+        self._inverses = {}
 
     def apply(self):
         '''
@@ -60,103 +176,201 @@ class HGateReduction(Reduction):
         If a sequence is found, it is replaced by its equivalent sequence which has less Hadamard Gates.
         '''
 
-        # First, remove all redundant Hadamard Gates (i.e. cancel adjacent Hadamard Gates)
-        for edge in self.dag.edges():
-            source, dest, _ = edge
-            if source.name == "h" and dest.name == "h":
-                self.dag.remove_op_node(source)
-                self.dag.remove_op_node(dest)
+        self._cache_wires()
 
+        # First, remove all redundant Hadamard Gates (i.e. cancel adjacent Hadamard Gates) and apply the
         # Phase Gate transformations:
         # H - P - H = P† - H - P†
         # H - P† - H = P - H - P
-        for wire in self.dag.wires:
-            wire_nodes = self.dag.nodes_on_wire(wire, True)
-            sequence = []
-            node: DAGNode
-
-            # Go through every node in the wire to find a valid phase gate sequence
-            for node in wire_nodes:
-                if node.name == "h" and sequence == []:
-                    sequence.append(node)
-                elif node.name == "h" and len(sequence) == 2:
-                    s_gate = sequence[1].op.inverse()
-                    # Substitute the found sequence by the equivalent sequence
-                    # which has reduced number of Hadamard Gates
-                    self.dag.substitute_node(sequence[0], sequence[1].op.inverse(), inplace=True)
-                    self.dag.substitute_node(sequence[1], HGate(), inplace=True)
-                    self.dag.substitute_node(node, s_gate, inplace=True)
-                elif self._is_phase_gate(node) and len(sequence) == 1:
-                    sequence.append(node)
-                else:
-                    sequence = []
+        # Both are found by a single scan of every wire, the found removals and substitutions are applied afterwards
+        cancelled = False
+        for wire in self._wires:
+            wire_nodes = self._wire_nodes[wire]
+            removals, substitutions = self._scan_phase_sequences(wire)
+            for index in removals:
+                self._remove(wire_nodes[index])
+            for index, op in substitutions:
+                self._substitute(wire, index, op)
+            cancelled = cancelled or bool(removals)
+
+        if cancelled:
+            self._cache_wires()
 
         # H ⊗ H - CNOT - H ⊗ H transformations
-        for node in self.dag.nodes():
-            if node.name == "cx":
-                predecessors = list(self.dag.predecessors(node))
-                successors = list(self.dag.successors(node))
-
-                # For every CNOT Gate, check if all the incoming and outgoing edges of the corresponding operation node
-                # are connected to nodes which correspond to Hadamard Gates
-                self.dag.edges(nodes=[node])
-                found = False
-                if len(predecessors) == 2 and len(predecessors) == 2:
-                    if all(pred.name == "h" for pred in predecessors) and all(succ.name == "h" for succ in successors):
-                        found = True
-
-                # When the sequence is found, the Hadamard Gates are removed and the CNOT Gate is flipped
-                if found:
-                    for pred in predecessors:
-                        self.dag.remove_op_node(pred)
-                    for suc in successors:
-                        self.dag.remove_op_node(suc)
-                    node.qargs.reverse()
+        # Only the CNOT nodes are visited instead of every node of the DAG. The neighbours of a CNOT node are read
+        # from its positions on the cached wires instead of querying its edges in the DAG
+        wire_nodes_of, wire_soa, wire_pos = self._wire_nodes, self._wire_soa, self._wire_pos
+        # The found Hadamard Gates and CNOT Gates are collected and the DAG is only modified after the search
+        to_remove = []
+        to_flip = []
+        # The Hadamard Gates which were already claimed by a CNOT Gate
+        claimed = set()
+        for node in self.dag.op_nodes(op=CXGate):
+            # A conditioned CNOT Gate has further incoming edges, hence its predecessors are never only Hadamard Gates
+            if node.op.condition is not None:
+                continue
+
+            # An open-controlled CNOT Gate is also a CXGate, but the identity does not hold for it
+            if node.name != "cx":
+                continue
+
+            # For every CNOT Gate, check if the previous and the next node on both of its wires are Hadamard Gates.
+            # A Hadamard Gate which was already found next to another CNOT Gate is no longer a neighbour
+            neighbours = []
+            for wire in node.qargs:
+                tags = wire_soa[wire][0]
+                i = wire_pos[wire][node]
+                if i == 0 or i + 1 == len(tags) or tags[i - 1] != _H or tags[i + 1] != _H:
+                    break
+                pred, succ = wire_nodes_of[wire][i - 1], wire_nodes_of[wire][i + 1]
+                if pred in claimed or succ in claimed:
+                    break
+                neighbours.append(pred)
+                neighbours.append(succ)
+            else:
+                to_remove.extend(neighbours)
+                claimed.update(neighbours)
+                to_flip.append(node)
+
+        # When the sequence is found, the Hadamard Gates are removed and the CNOT Gate is flipped
+        for node in to_remove:
+            self._remove(node)
+        for node in to_flip:
+            node.qargs = [node.qargs[1], node.qargs[0]]
+
+        # The Hadamard Gates removed above are still contained in the cached wires, hence only the wires of the
+        # flipped CNOT Gates have to be materialized again
+        for wire in {neighbour.qargs[0] for neighbour in claimed}:
+            self._refresh_wire(wire)
 
         # H - P - CNOT - P† - H = P† - CNOT - P
         # H - P† - CNOT - P - H = P - CNOT - P†
-        for wire_idx, wire in enumerate(self.dag.wires):
-            wire_nodes = self.dag.nodes_on_wire(wire, True)
-            sequence = []
-            node: DAGNode
-            # Go through every node in the wire to find a valid phase gate sequence
-            for node in wire_nodes:
-                if node.name == "h" and sequence == []:
-                    sequence.append(node)
-                elif node.name == "h" and len(sequence) == 4:
-                    # The sequence is found -> remove the Hadamard Gates and invert the Phase Gates inplace
-                    self.dag.remove_op_node(sequence[0])
-                    self.dag.remove_op_node(node)
-                    self.dag.substitute_node(sequence[1], sequence[1].op.inverse(), inplace=True)
-                    self.dag.substitute_node(sequence[3], sequence[3].op.inverse(), inplace=True)
-                elif self._is_phase_gate(node) and len(sequence) == 1:
-                    sequence.append(node)
-                elif node.name == "cx" and len(sequence) == 2:
-                    # The target of the CNOT node from the sequence must be on the same wire as other nodes
-                    target = node.qargs[1].index
-                    if target == wire_idx:
-                        sequence.append(node)
-                    else:
-                        sequence = []
-                elif len(sequence) == 3 and node.op == sequence[1].op.inverse():
-                    sequence.append(node)
-                else:
-                    sequence = []
+        # Every wire is scanned on its own and the found removals and substitutions are applied afterwards
+        for wire_idx, wire in enumerate(self._wires):
+            wire_nodes = self._wire_nodes[wire]
+            removals, substitutions = self._scan_cx_sequences(wire_idx, wire)
+            for index in removals:
+                self._remove(wire_nodes[index])
+            for index, op in substitutions:
+                self._substitute(wire, index, op)
         return self.dag
 
-    def _is_phase_gate(self, node: DAGNode):
+    def _scan_phase_sequences(self, wire):
+        """
+        Returns the removals (the indices of the nodes on the wire) which cancel adjacent Hadamard Gates and the
+        substitutions (the index of the node on the wire and its new operation) which replace the H - P - H and
+        H - P† - H sequences on the given wire. Only the cached wire is read, the DAG is not modified.
+
+        The phase gate sequences are searched on the wire as it is after the cancellation of the Hadamard Gates,
+        i.e. the cancelled pairs are skipped by the search.
+
+        :param wire: The wire to be scanned
+        """
+        wire_nodes = self._wire_nodes[wire]
+        tags = self._wire_soa[wire][0]
+        removals = []
+        substitutions = []
+        node: DAGNode
+
+        # Go through every node in the wire to find a valid phase gate sequence
+        # The state is the number of matched nodes, h0 and p1 are the indices of the matched nodes on the wire
+        state = h0 = p1 = 0
+        i = 0
+        while i < len(tags):
+            if i + 1 < len(tags) and tags[i] == _H and tags[i + 1] == _H:
+                # Adjacent Hadamard Gates cancel
+                removals.append(i)
+                removals.append(i + 1)
+                i += 2
+                continue
+            node = wire_nodes[i]
+            if tags[i] == _H and state == 0:
+                h0 = i
+                state = 1
+            elif tags[i] == _H and state == 2:
+                s_gate = self._inverse(wire_nodes[p1].op)
+                # Substitute the found sequence by the equivalent sequence
+                # which has reduced number of Hadamard Gates
+                substitutions.append((h0, s_gate.copy()))
+                substitutions.append((p1, HGate()))
+                substitutions.append((i, s_gate.copy()))
+                state = 0
+            elif state == 1 and self._is_phase_gate(tags[i], node):
+                p1 = i
+                state = 2
+            else:
+                state = 0
+            i += 1
+        return removals, substitutions
+
+    def _scan_cx_sequences(self, wire_idx: int, wire):
+        """
+        Returns the removals (the indices of the nodes on the wire) and the substitutions (the index of the node on
+        the wire and its new operation) which replace the H - P - CNOT - P† - H and H - P† - CNOT - P - H sequences
+        on the given wire. Only the cached wire is read, the DAG is not modified.
+
+        :param wire_idx: The index of the wire to be scanned
+        :param wire: The wire to be scanned
+        """
+        wire_nodes = self._wire_nodes[wire]
+        tags, _, targets = self._wire_soa[wire]
+        removals = []
+        substitutions = []
+        node: DAGNode
+        # Go through every node in the wire to find a valid phase gate sequence
+        # The state is the number of matched nodes, h0, p1 and p3 are the indices of the matched nodes on the wire
+        state = h0 = p1 = p3 = 0
+        for i, node in enumerate(wire_nodes):
+            if tags[i] == _H and state == 0:
+                h0 = i
+                state = 1
+            elif tags[i] == _H and state == 4:
+                # The sequence is found -> remove the Hadamard Gates and invert the Phase Gates inplace
+                removals.append(h0)
+                removals.append(i)
+                substitutions.append((p1, self._inverse(wire_nodes[p1].op).copy()))
+                substitutions.append((p3, self._inverse(wire_nodes[p3].op).copy()))
+                state = 0
+            elif state == 1 and self._is_phase_gate(tags[i], node):
+                p1 = i
+                state = 2
+            elif tags[i] == _CX and state == 2:
+                # The target of the CNOT node from the sequence must be on the same wire as other nodes
+                state = 3 if targets[i] == wire_idx else 0
+            elif state == 3 and node.op == self._inverse(wire_nodes[p1].op):
+                p3 = i
+                state = 4
+            else:
+                state = 0
+        return removals, substitutions
+
+    def _inverse(self, op):
+        """
+        Returns the inverse of the given phase gate operation. The inverse is shared by the whole pass, hence it
+        has to be copied before it is substituted into a node (the substitution writes the condition of the node
+        onto the operation).
+
+        :param op: The operation to be inverted
+        """
+        key = (op.name, tuple(op.params))
+        inverse = self._inverses.get(key)
+        if inverse is None:
+            inverse = self._inverses[key] = op.inverse()
+        return inverse
+
+    @staticmethod
+    def _is_phase_gate(tag: int, node: DAGNode):
         """
         A node represents a phase gate if
             - the gate is an S gate (or S†) or
             - the gate is Rz(pi/2)
+        :param tag: the gate tag of the node
         :param node: the node to be checked
         :return: True if node represents a phase gate
         """
-        if node.name == "s" or node.name == "sdg":
-            return True
-        elif node.name == "rz" and abs(node.op.params[0]) == np.pi / 2:
+        if tag == _S or tag == _SDG:
             return True
-        return False
+        return tag == _RZ and abs(node.op.params[0]) == _PI_2
 
 
 class RzReduction(Reduction):
@@ -167,7 +381,8 @@ class RzReduction(Reduction):
     def __init__(self, dag: DAGCircuit):
         super().__init__(dag)
         self.deleted_nodes = []
-        self.merged_nodes = {}
+        # The angles which are merged into the rotation gates, in addition to their own angles
+        self.merged_nodes = defaultdict(float)
 
     def apply(self):
         """
@@ -181,82 +396,113 @@ class RzReduction(Reduction):
         - Rz - CNOT = CNOT - Rz
         """
 
-        for wire in self.dag.wires:
-            wire_nodes = self.dag.nodes_on_wire(wire, True)
-            node: DAGNode
-            cursor = 0
-            for i, node in enumerate(wire_nodes):
-                # The cursor indicates the index of the last merged/cancelled rotation gate
-                # If no cancel/merge was possible, the cursor simply moves forward on the wire by one node
-                if i < cursor:
-                    continue
-                if node.name == "rz":
-                    cursor = self._search(i, wire, node)
+        self._cache_wires()
 
-        for node in self.deleted_nodes:
-            self.dag.remove_op_node(node)
+        # Every wire is scanned on its own and the found merges are applied afterwards
+        for wire_idx, wire in enumerate(self._wires):
+            wire_nodes = self._wire_nodes[wire]
+            tags, controls, targets = self._wire_soa[wire]
+            for i, merge_idx in self._scan_wire(tags, controls, targets, wire_idx):
+                # The rotation gate is cancelled/merged into the rotation gate it commutes with
+                node = wire_nodes[i]
+                merged_node = wire_nodes[merge_idx]
+                self.deleted_nodes.append(node)
+                self.merged_nodes[merged_node] += node.op.params[0]
 
-        for key in self.merged_nodes:
-            self.dag.substitute_node(key, RZGate(self.merged_nodes[key]), inplace=True)
+        for node in self.deleted_nodes:
+            self._remove(node)
+
+        for key, merged_angle in self.merged_nodes.items():
+            # The merged angle is brought into [-pi, pi] unless it has unbound parameters. A merged rotation gate
+            # without an angle is kept, since the following reductions depend on its position (see
+            # IdentityRzReduction)
+            angle = key.op.params[0] + merged_angle
+            if _is_numeric(angle):
+                angle = math.remainder(float(angle), _TWO_PI)
+            # Every merged node gets its own gate, since the substitution writes the condition of the node onto it
+            self._replace(key, RZGate(angle))
 
         return self.dag
 
-    def _search(self, rz_index: int, wire, node: DAGNode) -> int:
+    @staticmethod
+    def _scan_wire(tags: list, controls: list, targets: list, wire_idx: int) -> list:
         """
-        Searches for and returns the index of a node which commutes with the given node corresponding to a RZ operation.
-        If a commutation is not possible, the index of the next node on the wire is returned.
+        Returns the merges (the index of the rotation gate to be removed and the index of the rotation gate it is
+        merged into) found on the given wire. Only the cached wire is read, the DAG is not modified.
+
+        A single forward pass is made over the wire: after a merge/cancellation the pass continues behind the merged
+        rotation gate, otherwise it simply moves forward on the wire by one node.
+
+        :param tags: The gate tags of the wire
+        :param controls: The control wire indices of the wire
+        :param targets: The target wire indices of the wire
+        :param wire_idx: The index of the wire
+        """
+        merges = []
+        # Only the rotation gates of the wire are visited, the nodes up to the last merged rotation gate are skipped
+        resume = 0
+        for i in [i for i, tag in enumerate(tags) if tag == _RZ]:
+            if i < resume:
+                continue
+            merge_idx = RzReduction._search(i, tags, controls, targets, wire_idx)
+            if merge_idx is not None:
+                merges.append((i, merge_idx))
+                resume = merge_idx + 1
+        return merges
+
+    @staticmethod
+    def _search(rz_index: int, tags: list, controls: list, targets: list, wire_idx: int):
+        """
+        Searches for and returns the index of the rotation gate which the rotation gate at the given index commutes
+        with. Returns None if a commutation is not possible.
 
         :param rz_index: The index of the node to be commuted
-        :param wire: The wire the node is attached to
-        :param node: The the node to be commuted
+        :param tags: The gate tags of the wire the node is attached to
+        :param controls: The control wire indices of the wire the node is attached to
+        :param targets: The target wire indices of the wire the node is attached to
+        :param wire_idx: The index of the wire the node is attached to
         """
 
-        wire_nodes = list(self.dag.nodes_on_wire(wire, True))
-        if rz_index < len(wire_nodes):
-            wire_nodes = wire_nodes[rz_index + 1:]
-            i = 0
-            while i < len(wire_nodes):
+        length = len(tags)
+        i = rz_index + 1
+        while i < length:
+            tag = tags[i]
+            # If a further commutation is not possible but the current node is another rotation gate,
+            # we cancel/merge (no commutation sequence starts with a rotation gate)
+            if tag == _RZ:
+                return i
+            # Only a Hadamard Gate or a CNOT Gate can start a commutation, any other gate ends the search early
+            if tag == _H or tag == _CX:
                 # Look for three nodes ahead to check whether one of the 4 gate commutation rules apply
-                if i + 3 < len(wire_nodes):
-                    lookahead_nodes = wire_nodes[i:i + 3]
-                    if self._commutes(lookahead_nodes, wire.index):
-                        i += 3
-                        continue
+                if i + 3 < length and RzReduction._commutes(tags, targets, i, wire_idx):
+                    i += 3
+                    continue
                 # Check for a commutation with a CNOT Gate
-                if i + 1 < len(wire_nodes) and wire_nodes[i].name == "cx":
-                    if wire_nodes[i].qargs[0].index == wire.index:
-                        i += 1
-                        continue
-                # If a further commutation is not possible but the current node is another rotation gate,
-                # we cancel/merge
-                if wire_nodes[i].name == "rz":
-                    angle = wire_nodes[i].op.params[0]
-                    self.deleted_nodes.append(node)
-                    self.merged_nodes[wire_nodes[i]] = angle + node.op.params[0]
-                    return rz_index + i + 2
-                # Commutation is not possible, the search will continue on the next node on the wire
-                return rz_index + 1
+                if tag == _CX and i + 1 < length and controls[i] == wire_idx:
+                    i += 1
+                    continue
+            # Commutation is not possible, the search will continue on the next node on the wire
+            return None
         # Commutation is not possible, the search will continue on the next node on the wire
-        return rz_index + 1
+        return None
 
-    def _commutes(self, lookahead_nodes, wire_idx) -> bool:
+    @staticmethod
+    def _commutes(tags: list, targets: list, i: int, wire_idx: int) -> bool:
         """
-        Returns True if the given three nodes correspond to one of the two commutation sequences.
+        Returns True if the three nodes starting at the given index correspond to one of the two commutation
+        sequences.
 
-        :param lookahead_nodes: The nodes to be commuted
-        :param wire_idx: The wire index the lookahead_nodes are on
+        :param tags: The gate tags of the wire
+        :param targets: The target wire indices of the wire
+        :param i: The index of the first of the three nodes to be commuted
+        :param wire_idx: The index of the wire
         """
-        names = [node.name for node in lookahead_nodes]
-        if names == ["h", "cx", "h"]:
-            cx = lookahead_nodes[1]
+        if tags[i] == _H and tags[i + 1] == _CX and tags[i + 2] == _H:
             # The target of the CNOT Gate must be on the same wire as other commuting nodes
-            if cx.qargs[1].index == wire_idx:
-                return True
-        elif names == ["cx", "rz", "cx"]:
-            cx_nodes = [lookahead_nodes[0], lookahead_nodes[2]]
+            return targets[i + 1] == wire_idx
+        elif tags[i] == _CX and tags[i + 1] == _RZ and tags[i + 2] == _CX:
             # The targets of the CNOT Gates must both be on the same wire as other commuting nodes
-            if all(cx.qargs[1].index == wire_idx for cx in cx_nodes):
-                return True
+            return targets[i] == wire_idx and targets[i + 2] == wire_idx
         return False
 
 
@@ -279,14 +525,19 @@ class CxReduction(Reduction):
         - CNOT (target) - H - CNOT (control) - H = H - CNOT (control) - H - CNOT (target)
         """
 
-        for wire_idx, wire in enumerate(self.dag.wires):
-            wire_nodes = self.dag.nodes_on_wire(wire, True)
+        self._cache_wires()
+
+        for wire_idx, wire in enumerate(self._wires):
+            wire_nodes = self._wire_nodes[wire]
+            tags, controls, targets = self._wire_soa[wire]
             node: DAGNode
             commuted_nodes = []
+            # The same nodes as a set, so that the membership test does not scan the list
+            commuted = set()
             for node_idx, node in enumerate(wire_nodes):
-                if node.name == "cx" and node not in commuted_nodes:
-                    control = node.qargs[0].index
-                    target = node.qargs[1].index
+                if tags[node_idx] == _CX and node not in commuted:
+                    control = controls[node_idx]
+                    target = targets[node_idx]
                     if control == wire_idx:
                         other_wire = target
                         type = "control"
@@ -301,15 +552,21 @@ class CxReduction(Reduction):
                         # CNOT node) obtained by the search process for both the target and the control wire
                         # must be the same for a successful full-commutation
                         res1 = self._search(wire, control, target, node, type, node_idx)
-                        other_wire = self.dag.wires[other_wire]
+                        other_wire = self._wires[other_wire]
                         res2 = self._search(other_wire, control, target, node, other_type)
                         if res1 == res2 and res1 is not None:
                             commuted_nodes.append(node)
                             commuted_nodes.append(res1)
+                            commuted.add(node)
+                            commuted.add(res1)
 
             # Remove the CNOT nodes after commutation
             for n in commuted_nodes:
-                self.dag.remove_op_node(n)
+                self._remove(n)
+
+            # Only the wires of the removed CNOT nodes have to be materialized again
+            for changed_wire in {qarg for n in commuted_nodes for qarg in n.qargs}:
+                self._refresh_wire(changed_wire)
 
         return self.dag
 
@@ -326,73 +583,97 @@ class CxReduction(Reduction):
         'target' if its target qubit is on the wire instead
         """
 
-        wire_nodes = list(self.dag.nodes_on_wire(wire_idx, True))
-        if index is not None and index + 1 != len(wire_nodes):
-            wire_nodes = wire_nodes[index + 1:]
-        elif index is None:
-            for idx, n in enumerate(wire_nodes):
-                if n == node and idx + 1 != len(wire_nodes):
-                    wire_nodes = wire_nodes[idx + 1:]
-                    break
-        else:
+        wire_nodes = self._wire_nodes[wire_idx]
+        if index is None:
+            index = self._wire_pos[wire_idx][node]
+        if index + 1 == len(wire_nodes):
             return None
 
-        return self._get_commutation_info(control_idx, target_idx, wire_nodes, type)
+        tags, controls, targets = self._wire_soa[wire_idx]
+        cancel_idx = self._get_commutation_info(tags, controls, targets, index + 1, control_idx, target_idx,
+                                                type == "control")
+        return None if cancel_idx is None else wire_nodes[cancel_idx]
 
-    def _get_commutation_info(self, control_idx, target_idx, wire_nodes, type: str):
+    @staticmethod
+    def _get_commutation_info(tags: list, controls: list, targets: list, cursor: int, control_idx: int,
+                              target_idx: int, is_control: bool):
         """
-        Returns the node to be cancelled with if a half-commutation was successful. Returns None otherwise.
+        Returns the index of the node to be cancelled with if a half-commutation was successful. Returns None
+        otherwise. Only the plain integer lists of the cached wire are read.
 
+        :param tags: The gate tags of the wire of the to-be-commuted node
+        :param controls: The control wire indices of the wire of the to-be-commuted node
+        :param targets: The target wire indices of the wire of the to-be-commuted node
+        :param cursor: The index of the first node following the to-be-commuted node on the wire
         :param control_idx: The wire index corresponding to the control qubit of the to-be-commuted node
         :param target_idx: The target index corresponding to the target qubit of the to-be-commuted node
-        :param wire_nodes: The nodes on the wire of the to-be-commuted node
-        :param type: The type is 'control' if the to-be-commuted node has its control qubit on the inspected wire;
-        'target' if its target qubit is on the wire instead
+        :param is_control: True if the to-be-commuted node has its control qubit on the inspected wire;
+        False if its target qubit is on the wire instead
         """
 
-        cursor = 0
-        while cursor < len(wire_nodes):
-            current_node = wire_nodes[cursor]
-            if current_node.name == "cx":
-                control = current_node.qargs[0].index
-                target = current_node.qargs[1].index
-                type_dic = {"control": control_idx, "target": target_idx}
-                current_node_type_dic = {"control": control, "target": target}
-                types = ["control", "target"]
-                types.remove(type)
-                other_type = types[0]
-                if current_node_type_dic[type] == type_dic[type] and current_node_type_dic[other_type] != type_dic[
-                    other_type]:
+        # The qubit of the to-be-commuted node on the inspected wire and its other qubit
+        my_same = control_idx if is_control else target_idx
+        my_other = target_idx if is_control else control_idx
+        # The third commutation rule only applies to CNOT Gates on adjacent qubits
+        adjacent = abs(control_idx - target_idx) == 1
+        length = len(tags)
+        while cursor < length:
+            if tags[cursor] == _CX:
+                control = controls[cursor]
+                target = targets[cursor]
+                cur_same = control if is_control else target
+                cur_other = target if is_control else control
+                if cur_same == my_same and cur_other != my_other:
                     # Commute
                     cursor += 1
                     continue
-                elif current_node_type_dic[type] != type_dic[type]:
+                elif cur_same != my_same:
                     # Cannot commute
                     return None
                 elif target == target_idx and control == control_idx:
                     # There is a possibility for cancellation
-                    return current_node
-            elif current_node.name == "h" and abs(control_idx - target_idx) == 1:
+                    return cursor
+            elif tags[cursor] == _H and adjacent:
                 # We try to commute with the third commutation rule
-                if cursor + 2 != len(wire_nodes):
-                    lookahead_nodes = wire_nodes[cursor: cursor + 3]
-                    if self._commutes(lookahead_nodes, target_idx):
+                if cursor + 2 < length:
+                    if CxReduction._commutes(tags, controls, targets, cursor, target_idx):
                         cursor += 3
                         continue
             return None
         return None
 
-    def _commutes(self, lookahead_nodes, target_idx):
+    @staticmethod
+    def _commutes(tags: list, controls: list, targets: list, cursor: int, target_idx: int) -> bool:
         """
-        Returns True if the given three nodes correspond to the third commutation rule.
+        Returns True if the three nodes starting at the given index correspond to the third commutation rule.
 
-        :param lookahead_nodes: The nodes to be commuted
+        :param tags: The gate tags of the wire
+        :param controls: The control wire indices of the wire
+        :param targets: The target wire indices of the wire
+        :param cursor: The index of the first of the three nodes to be commuted
         :param target_idx: The wire index of the target qubit of the CNOT Gate to be commuted
         """
-        names = [node.name for node in lookahead_nodes]
-        if names == ["h", "cx", "h"]:
-            control = lookahead_nodes[1].qargs[0].index
-            target = lookahead_nodes[1].qargs[1].index
-            if control == target_idx and target > control:
-                return True
-        return False
+        return (tags[cursor] == _H and tags[cursor + 1] == _CX and tags[cursor + 2] == _H
+                and controls[cursor + 1] == target_idx and targets[cursor + 1] > target_idx)
+
+
+class IdentityRzReduction(Reduction):
+    '''
+    Returns the given DAG without the Rz Gates which are the identity (up to a global phase).
+    '''
+
+    def __init__(self, dag: DAGCircuit):
+        super().__init__(dag)
+
+    def apply(self):
+        """
+        Removes every Rz Gate whose angle is a multiple of 2 pi (Rz Gates with unbound parameters are kept). The
+        removal is meant to be applied once after the whole optimization procedure: the rotation gates which merged
+        into the identity still mark the positions where the following reductions merge further rotation gates, and
+        removing them earlier leads to a circuit with more CNOT Gates.
+        """
+        for node in self.dag.op_nodes(op=RZGate):
+            angle = node.op.params[0]
+            if node.name == "rz" and _is_numeric(angle) and abs(math.remainder(float(angle), _TWO_PI)) < 1e-12:
+                self._remove(node)
+        return self.dag
@@ -1,7 +1,10 @@
+import copy
 import unittest
 
 import numpy as np
-from qiskit import QuantumCircuit
+from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+from qiskit.circuit import Instruction, Parameter
+from qiskit.circuit.library import CXGate
 from qiskit.converters import circuit_to_dag, dag_to_circuit
 
 import optimizations
@@ -9,6 +12,14 @@ import optimizations
 
 class TestEquivalences(unittest.TestCase):
 
+    @staticmethod
+    def optimize(reduction_class, qc):
+        """
+        Applies the given reduction to the given circuit and returns the optimized circuit.
+        """
+        reduction = reduction_class(circuit_to_dag(qc))
+        return dag_to_circuit(reduction.apply())
+
     # H ⊗ H - CNOT - H ⊗ H
     def test_cnot_transformation(self):
         qc = QuantumCircuit(2)
@@ -27,8 +38,6 @@ class TestEquivalences(unittest.TestCase):
         qc.h(0)
         qc.h(1)
 
-        dag = circuit_to_dag(qc)
-
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(2)
         qc_ref.cx(1, 0)
@@ -37,13 +46,131 @@ class TestEquivalences(unittest.TestCase):
         qc_ref.cx(1, 0)
 
         # Apply the optimization procedure
-        reduction = optimizations.HGateReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
 
         # The circuit should not change
         assert qc_ref == qc_optimized
 
+    # H ⊗ H - CNOT - H ⊗ (not H)
+    def test_cnot_transformation_partial(self):
+        qc = QuantumCircuit(2)
+        qc.h(0)
+        qc.h(1)
+        qc.cx(0, 1)
+        qc.h(0)
+        qc.x(1)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
+
+        # Only one of the successors is a Hadamard Gate, hence the circuit should not change
+        assert qc == qc_optimized
+
+    # H ⊗ H - CNOT - H ⊗ H - CNOT - H ⊗ H
+    def test_cnot_transformation_shared(self):
+        qc = QuantumCircuit(2)
+        qc.h(0)
+        qc.h(1)
+        qc.cx(0, 1)
+        qc.h(0)
+        qc.h(1)
+        qc.cx(0, 1)
+        qc.h(0)
+        qc.h(1)
+
+        # Reference optimized quantum circuit
+        qc_ref = QuantumCircuit(2)
+        qc_ref.cx(1, 0)
+        qc_ref.cx(0, 1)
+        qc_ref.h(0)
+        qc_ref.h(1)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
+
+        # The Hadamard Gates between the CNOT Gates are only removed once, hence only the first CNOT Gate is flipped
+        assert qc_ref == qc_optimized
+
+    # The optimization procedure works on a copy of the input circuit
+    def test_cnot_transformation_input_unchanged(self):
+        qc = QuantumCircuit(2)
+        qc.h(0)
+        qc.h(1)
+        qc.cx(0, 1)
+        qc.h(0)
+        qc.h(1)
+        qc_input = copy.deepcopy(qc)
+
+        # Apply the optimization procedure
+        self.optimize(optimizations.HGateReduction, qc)
+
+        # The control and target of the CNOT Gate in the input circuit should not be swapped
+        assert qc == qc_input
+
+    # H ⊗ H - open-controlled CNOT - H ⊗ H
+    def test_cnot_transformation_open_control(self):
+        qc = QuantumCircuit(2)
+        qc.h(0)
+        qc.h(1)
+        qc.append(CXGate(ctrl_state=0), [0, 1])
+        qc.h(0)
+        qc.h(1)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
+
+        # The control and target of an open-controlled CNOT Gate cannot be swapped, hence the circuit should not change
+        assert qc == qc_optimized
+
+    # H - H = I
+    def test_h_cancellation_1(self):
+        qc = QuantumCircuit(1)
+        qc.h(0)
+        qc.h(0)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
+
+        # Both Hadamard Gates should be removed
+        assert QuantumCircuit(1) == qc_optimized
+
+    # H - H - H = H
+    def test_h_cancellation_2(self):
+        qc = QuantumCircuit(1)
+        qc.h(0)
+        qc.h(0)
+        qc.h(0)
+
+        # Reference optimized quantum circuit
+        qc_ref = QuantumCircuit(1)
+        qc_ref.h(0)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
+
+        assert qc_ref == qc_optimized
+
+    # H - P - H - H - H = H - P - H = P_dagger - H - P_dagger
+    def test_h_cancellation_3(self):
+        qc = QuantumCircuit(1)
+        qc.h(0)
+        qc.s(0)
+        qc.h(0)
+        qc.h(0)
+        qc.h(0)
+
+        # Reference optimized quantum circuit
+        qc_ref = QuantumCircuit(1)
+        qc_ref.sdg(0)
+        qc_ref.h(0)
+        qc_ref.sdg(0)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
+
+        # The cancelled Hadamard Gates are skipped by the search for the phase gate sequence
+        assert qc_ref == qc_optimized
+
     # S gate transformation
     def test_p_transformation_1(self):
         qc = QuantumCircuit(1)
@@ -54,7 +181,6 @@ class TestEquivalences(unittest.TestCase):
         qc.h(0)
         qc.s(0)
         qc.h(0)
-        dag = circuit_to_dag(qc)
 
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(1)
@@ -67,9 +193,7 @@ class TestEquivalences(unittest.TestCase):
         qc_ref.sdg(0)
 
         # Apply the optimization procedure
-        reduction = optimizations.HGateReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
 
         # The circuit should not change
         assert qc_ref == qc_optimized
@@ -80,7 +204,6 @@ class TestEquivalences(unittest.TestCase):
         qc.h(0)
         qc.sdg(0)
         qc.h(0)
-        dag = circuit_to_dag(qc)
 
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(1)
@@ -89,13 +212,31 @@ class TestEquivalences(unittest.TestCase):
         qc_ref.s(0)
 
         # Apply the optimization procedure
-        reduction = optimizations.HGateReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
 
         # The circuit should not change
         assert qc_ref == qc_optimized
 
+    # S gate transformations next to a conditioned S gate transformation
+    def test_p_transformation_condition(self):
+        qr = QuantumRegister(2)
+        cr = ClassicalRegister(1)
+        qc = QuantumCircuit(qr, cr)
+        qc.h(0)
+        qc.s(0)
+        qc.h(0)
+        qc.h(1)
+        qc.s(1)
+        qc.h(1).c_if(cr, 1)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
+
+        # The condition of the transformed sequence on the second wire should not spread to the first wire
+        instructions = [instruction for instruction, qargs, _ in qc_optimized.data if qargs == [qr[0]]]
+        assert [instruction.name for instruction in instructions] == ["sdg", "h", "sdg"]
+        assert all(instruction.condition is None for instruction in instructions)
+
     # H - P - CNOT - P_dagger - H = P_dagger - CNOT - P
     def test_p_transformation_3(self):
         qc = QuantumCircuit(2)
@@ -104,7 +245,6 @@ class TestEquivalences(unittest.TestCase):
         qc.cx(0, 1)
         qc.sdg(1)
         qc.h(1)
-        dag = circuit_to_dag(qc)
 
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(2)
@@ -113,9 +253,7 @@ class TestEquivalences(unittest.TestCase):
         qc_ref.s(1)
 
         # Apply the optimization procedure
-        reduction = optimizations.HGateReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
 
         # The circuit should not change
         assert qc_ref == qc_optimized
@@ -128,7 +266,6 @@ class TestEquivalences(unittest.TestCase):
         qc.cx(0, 1)
         qc.s(1)
         qc.h(1)
-        dag = circuit_to_dag(qc)
 
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(2)
@@ -137,13 +274,42 @@ class TestEquivalences(unittest.TestCase):
         qc_ref.sdg(1)
 
         # Apply the optimization procedure
-        reduction = optimizations.HGateReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
 
         # The circuit should not change
         assert qc_ref == qc_optimized
 
+    # Two H - P - CNOT - P_dagger - H sequences on the same wire
+    def test_p_transformation_5(self):
+        qc = QuantumCircuit(2)
+        qc.h(1)
+        qc.s(1)
+        qc.cx(0, 1)
+        qc.sdg(1)
+        qc.h(1)
+        qc.x(1)
+        qc.h(1)
+        qc.sdg(1)
+        qc.cx(0, 1)
+        qc.s(1)
+        qc.h(1)
+
+        # Reference optimized quantum circuit
+        qc_ref = QuantumCircuit(2)
+        qc_ref.sdg(1)
+        qc_ref.cx(0, 1)
+        qc_ref.s(1)
+        qc_ref.x(1)
+        qc_ref.s(1)
+        qc_ref.cx(0, 1)
+        qc_ref.sdg(1)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.HGateReduction, qc)
+
+        # Both sequences should be replaced
+        assert qc_ref == qc_optimized
+
     def test_rz_commutation_1(self):
         qc = QuantumCircuit(3)
         qc.rz(np.pi, 0)
@@ -158,8 +324,6 @@ class TestEquivalences(unittest.TestCase):
         qc.rz(np.pi, 0)
         qc.cnot(0, 2)
         qc.rz(np.pi, 0)
-        print(qc.draw())
-        dag = circuit_to_dag(qc)
 
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(3)
@@ -171,14 +335,12 @@ class TestEquivalences(unittest.TestCase):
         qc_ref.h(0)
         qc_ref.cnot(2, 0)
         qc_ref.h(0)
-        qc_ref.rz(2 * np.pi, 0)
+        qc_ref.rz(0, 0)
         qc_ref.cnot(0, 2)
         qc_ref.rz(np.pi, 0)
 
         # Apply the optimization procedure
-        reduction = optimizations.RzReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.RzReduction, qc)
 
         assert qc_ref == qc_optimized
 
@@ -189,19 +351,88 @@ class TestEquivalences(unittest.TestCase):
         qc.rz(-np.pi, 1)
         qc.cnot(0, 1)
         qc.rz(np.pi, 1)
-        dag = circuit_to_dag(qc)
 
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(2)
         qc_ref.cnot(0, 1)
         qc_ref.rz(-np.pi, 1)
         qc_ref.cnot(0, 1)
-        qc_ref.rz(2 * np.pi, 1)
+        qc_ref.rz(0, 1)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.RzReduction, qc)
+
+        assert qc_ref == qc_optimized
+
+    # The merged angle is brought into [-pi, pi]
+    def test_rz_normalization(self):
+        qc = QuantumCircuit(1)
+        qc.rz(np.pi, 0)
+        qc.rz(np.pi / 2, 0)
+
+        # Reference optimized quantum circuit
+        qc_ref = QuantumCircuit(1)
+        qc_ref.rz(-np.pi / 2, 0)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.RzReduction, qc)
+
+        assert qc_ref == qc_optimized
+
+    # Rotation gates with unbound parameters are merged without bringing the angle into [-pi, pi]
+    def test_rz_parameter(self):
+        theta = Parameter('theta')
+        qc = QuantumCircuit(1)
+        qc.rz(theta, 0)
+        qc.rz(0.3, 0)
+
+        # Reference optimized quantum circuit
+        qc_ref = QuantumCircuit(1)
+        qc_ref.rz(theta + 0.3, 0)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.RzReduction, qc)
+
+        assert qc_ref == qc_optimized
+
+        # A rotation gate with unbound parameters is never removed as the identity
+        qc_optimized = self.optimize(optimizations.IdentityRzReduction, qc_ref)
+
+        assert qc_ref == qc_optimized
+
+    # Merged rotation gates with the same angle on different wires
+    def test_rz_merge_condition(self):
+        qr = QuantumRegister(2)
+        cr = ClassicalRegister(1)
+        qc = QuantumCircuit(qr, cr)
+        qc.rz(0.5, 0)
+        qc.rz(0.5, 0)
+        qc.rz(0.5, 1)
+        qc.rz(0.5, 1).c_if(cr, 1)
+
+        # Apply the optimization procedure
+        qc_optimized = self.optimize(optimizations.RzReduction, qc)
+
+        # The condition of the merged rotation gate on the second wire should not spread to the first wire
+        instructions = [instruction for instruction, qargs, _ in qc_optimized.data if qargs == [qr[0]]]
+        assert len(instructions) == 1
+        assert instructions[0].params == [1.0]
+        assert instructions[0].condition is None
+
+    def test_rz_identity(self):
+        qc = QuantumCircuit(2)
+        qc.rz(0, 0)
+        qc.cnot(0, 1)
+        qc.rz(2 * np.pi, 1)
+        qc.rz(np.pi, 1)
+
+        # Reference optimized quantum circuit
+        qc_ref = QuantumCircuit(2)
+        qc_ref.cnot(0, 1)
+        qc_ref.rz(np.pi, 1)
 
         # Apply the optimization procedure
-        reduction = optimizations.RzReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.IdentityRzReduction, qc)
 
         assert qc_ref == qc_optimized
 
@@ -211,7 +442,6 @@ class TestEquivalences(unittest.TestCase):
         qc.cx(1, 2)
         qc.cx(0, 1)
         qc.cx(0, 2)
-        dag = circuit_to_dag(qc)
 
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(3)
@@ -219,9 +449,7 @@ class TestEquivalences(unittest.TestCase):
         qc_ref.cx(0, 1)
 
         # Apply the optimization procedure
-        reduction = optimizations.CxReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.CxReduction, qc)
 
         assert qc_ref == qc_optimized
 
@@ -232,12 +460,9 @@ class TestEquivalences(unittest.TestCase):
         qc.cx(0, 1)
         qc.h(2)
         qc.cx(0, 2)
-        dag = circuit_to_dag(qc)
 
         # Apply the optimization procedure
-        reduction = optimizations.CxReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.CxReduction, qc)
 
         # The circuit should not change
         assert qc == qc_optimized
@@ -251,7 +476,6 @@ class TestEquivalences(unittest.TestCase):
         qc.cx(0, 2)
         qc.cx(0, 1)
         qc.h(0)
-        dag = circuit_to_dag(qc)
 
         # Reference optimized quantum circuit
         qc_ref = QuantumCircuit(3)
@@ -262,8 +486,21 @@ class TestEquivalences(unittest.TestCase):
         qc_ref.h(0)
 
         # Apply the optimization procedure
-        reduction = optimizations.CxReduction(dag)
-        dag = reduction.apply()
-        qc_optimized = dag_to_circuit(dag)
+        qc_optimized = self.optimize(optimizations.CxReduction, qc)
 
         assert qc_ref == qc_optimized
+
+    # Instructions which act only on classical bits
+    def test_classical_instruction(self):
+        qc = QuantumCircuit(2, 1)
+        qc.h(0)
+        qc.append(Instruction('op', 0, 1, []), [], [0])
+        qc.cx(0, 1)
+        qc.h(0)
+
+        for reduction_class in (optimizations.HGateReduction, optimizations.RzReduction,
+                                optimizations.CxReduction, optimizations.IdentityRzReduction):
+            qc_optimized = self.optimize(reduction_class, qc)
+
+            # The circuit should not change
+            assert qc == qc_optimized